@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+import frame_graph
+from frame_capture import FrameRecord
+from figure_frame_colorful import FrameGraph
+
+
+def import_time(module, number=5):
+    # Fresh interpreters, so nothing is cached in sys.modules
+    best = None
+    with open(os.devnull, 'w') as devnull:
+        for _ in range(number):
+            started = time.time()
+            subprocess.check_call(
+                [sys.executable, '-c', 'import ' + module], stderr=devnull)
+            elapsed = time.time() - started
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class LegacyAGraphFrameGraph(FrameGraph):
+    # Reference copy of the build path before graphs were kept in plain
+    # dicts: one pygraphviz C-binding call per subgraph, node and edge.
+    # Same colorful attributes, so only the build strategy differs
+
+    def __init__(self, *args, **kwargs):
+        kwargs.pop('backend', None)
+        super(LegacyAGraphFrameGraph, self).__init__(*args, **kwargs)
+        import pygraphviz
+        self._graph = pygraphviz.AGraph(
+            strict=self.strict, directed=self.directed)
+        self._agraph_subgraphs = {}
+
+    def add_edge(self, start, end, group=None, label=None):
+        self._num_edges += 1
+        start_id = self.add_node(start)
+        end_id = self.add_node(end)
+        self._graph.add_edge(start_id, end_id, **self._edge_attrs(start, end))
+
+    def add_node(self, record, group=None):
+        key = (None, record.filename, record.firstlineno, record.name)
+        node_id = self._node_ids.get(key)
+        if node_id is None:
+            node_id = 'n{0}'.format(len(self._node_ids))
+            self._node_ids[key] = node_id
+            subgraph = self.add_subgraph(record.filename)
+            subgraph.add_node(node_id, **self._node_attrs(record))
+        return node_id
+
+    def add_subgraph(self, name, group=None):
+        subgraph = self._agraph_subgraphs.get(name)
+        if subgraph is None:
+            subgraph = self._graph.add_subgraph(
+                name='cluster' + name, **self._subgraph_attrs(name))
+            self._agraph_subgraphs[name] = subgraph
+        return subgraph
+
+    def draw(self, path, format=None, prog='dot'):
+        self._graph.draw(path, format=format, prog=prog)
+
+    def close(self):
+        self._graph.close()
+
+
+# Column name -> (graph class, backend)
+graph_builds = [
+    ('agraph (old)', LegacyAGraphFrameGraph, None),
+    (frame_graph.AGRAPH, FrameGraph, frame_graph.AGRAPH),
+    (frame_graph.DOT, FrameGraph, frame_graph.DOT),
+    (frame_graph.SVG, FrameGraph, frame_graph.SVG),
+]
+
+
+def synthetic_stack(depth, packages=10):
+    return [
+        FrameRecord(
+            '/venv/lib/python2.7/site-packages/pkg{0}/mod.py'.format(
+                index % packages),
+            index * 10 + 5, 'func{0}'.format(index), index * 10)
+        for index in range(depth)
+    ]
+
+
+def render_time(graph_cls, backend, stack, out, number=3, draw=True):
+    best = None
+    for _ in range(number):
+        started = time.time()
+        graph = graph_cls(strict=False, directed=True, backend=backend)
+        for index, start in enumerate(stack[:-1]):
+            graph.add_edge(start, stack[index + 1])
+        if draw:
+            graph.draw(out, prog='dot')
+        graph.close()
+        elapsed = time.time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def benchmark(depths=(10, 100, 1000)):
+    print 'import time (best of 5, includes interpreter start-up)'
+    for module in ('sys', 'figure_frame_colorful', 'pygraphviz'):
+        try:
+            print '  {0:<24} {1:8.1f} ms'.format(
+                module, import_time(module) * 1e3)
+        except subprocess.CalledProcessError:
+            print '  {0:<24} {1:>8}'.format(module, 'n/a')
+
+    out = os.path.join(tempfile.mkdtemp(), 'figure.svg')
+    for title, draw in (('graph build only', False),
+                        ('build and render to svg', True)):
+        print '{0} (best of 3)'.format(title)
+        print '  {0:>6} {1}'.format('depth', ' '.join(
+            '{0:>12}'.format(name) for name, _, _ in graph_builds))
+        for depth in depths:
+            stack = synthetic_stack(depth)
+            row = []
+            for _, graph_cls, backend in graph_builds:
+                try:
+                    row.append('{0:9.1f} ms'.format(render_time(
+                        graph_cls, backend, stack, out, draw=draw) * 1e3))
+                except (ImportError, OSError, IOError):
+                    row.append('{0:>12}'.format('n/a'))
+            print '  {0:>6} {1}'.format(depth, ' '.join(row))
+
+if __name__ == '__main__':
+    depths = [int(arg) for arg in sys.argv[1:]] or (10, 100, 1000)
+    benchmark(depths)
@@ -0,0 +1,37 @@
+import sys
+import timeit
+import inspect
+
+from frame_capture import capture_stack
+
+
+def recurse(depth, func):
+    if depth <= 1:
+        return func()
+    return recurse(depth - 1, func)
+
+
+def inspect_capture():
+    stack = inspect.stack()
+    del stack
+
+
+def fast_capture():
+    stack = capture_stack()
+    del stack
+
+
+def benchmark(depths=(10, 50, 100, 200, 500), number=200):
+    print '{0:>6} {1:>14} {2:>14} {3:>8}'.format(
+        'depth', 'inspect (us)', 'capture (us)', 'speedup')
+    for depth in depths:
+        slow = timeit.timeit(
+            lambda: recurse(depth, inspect_capture), number=number)
+        fast = timeit.timeit(
+            lambda: recurse(depth, fast_capture), number=number)
+        print '{0:>6} {1:>14.1f} {2:>14.1f} {3:>7.1f}x'.format(
+            depth, slow / number * 1e6, fast / number * 1e6, slow / fast)
+
+if __name__ == '__main__':
+    depths = [int(arg) for arg in sys.argv[1:]] or (10, 50, 100, 200, 500)
+    benchmark(depths)
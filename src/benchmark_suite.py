@@ -0,0 +1,252 @@
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import inspect
+import argparse
+import resource
+import tempfile
+import importlib
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import frame_graph
+from frame_capture import capture_stack
+from frame_locals import deep_size
+
+renderers = ('figure_frame_plain', 'figure_frame_colorful',
+             'figure_frame_html')
+
+module_source = '''
+def call(chain, index, callback):
+    if index == len(chain):
+        return callback()
+    return chain[index](chain, index + 1, callback)
+
+
+def recurse(chain, index, callback):
+    # Consecutive entries of the same function in the chain recurse
+    if index == len(chain):
+        return callback()
+    return chain[index](chain, index + 1, callback)
+'''
+
+
+class SyntheticStacks(object):
+    # Real modules under a fake site-packages, so frames carry real
+    # filenames and line numbers for every renderer
+
+    def __init__(self, packages=10, modules=5, recursion=5):
+        self.recursion = recursion
+        self.root = tempfile.mkdtemp()
+        site_packages = os.path.join(self.root, 'site-packages')
+        self.functions = []
+        sys.path.insert(0, site_packages)
+        for package in range(packages):
+            package_dir = os.path.join(
+                site_packages, 'benchpkg{0}'.format(package))
+            os.makedirs(package_dir)
+            open(os.path.join(package_dir, '__init__.py'), 'w').close()
+            for module in range(modules):
+                name = 'mod{0}'.format(module)
+                with open(os.path.join(package_dir, name + '.py'), 'w') as f:
+                    f.write(module_source)
+                self.functions.append(importlib.import_module(
+                    'benchpkg{0}.{1}'.format(package, name)))
+
+    def chain(self, depth):
+        chain = []
+        index = 0
+        while len(chain) < depth:
+            module = self.functions[index % len(self.functions)]
+            if self.recursion and index % 7 == 6:
+                chain.extend([module.recurse] * self.recursion)
+            else:
+                chain.append(module.call)
+            index += 1
+        return chain[:depth]
+
+    def run(self, depth, callback):
+        chain = self.chain(depth)
+        return chain[0](chain, 1, callback)
+
+    def close(self):
+        sys.path.remove(os.path.join(self.root, 'site-packages'))
+        shutil.rmtree(self.root)
+
+
+def measure_here(func, number):
+    # Collection is off while timing, as in timeit. The results of every
+    # call are kept, so the growth in gc-tracked objects and their deep
+    # size give what a call allocates and retains, also on Python 2
+    # where tracemalloc is missing
+    gc.collect()
+    gc.disable()
+    if tracemalloc is not None:
+        tracemalloc.start()
+    allocated = peak_allocated = None
+    # ru_maxrss is in kilobytes on Linux
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    objects = len(gc.get_objects())
+    times = []
+    results = []
+    try:
+        for _ in range(number):
+            started = time.time()
+            results.append(func())
+            times.append(time.time() - started)
+        retained_objects = len(gc.get_objects()) - objects - 1
+        if tracemalloc is not None:
+            allocated, peak_allocated = tracemalloc.get_traced_memory()
+    finally:
+        if tracemalloc is not None:
+            tracemalloc.stop()
+        gc.enable()
+    return {
+        'best': min(times),
+        'mean': sum(times) / len(times),
+        'retained_objects': retained_objects / float(number),
+        'retained_bytes':
+            deep_size(results, 10 ** 6, set())[0] / float(number),
+        'allocated': allocated,
+        'peak_allocated': peak_allocated,
+        'peak_rss_delta':
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss,
+    }
+
+
+def measure(func, number):
+    # Each phase runs in a forked child, whose peak RSS starts from its
+    # current RSS, so peak_rss_delta belongs to this phase alone
+    if not hasattr(os, 'fork'):
+        return measure_here(func, number)
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Whatever happens, the child must never unwind into the parent's
+        # generators and finally blocks (which remove the stack modules
+        # and the output directory), nor flush the parent's buffers
+        status = 1
+        try:
+            os.close(read_fd)
+            try:
+                result = measure_here(func, number)
+            except Exception as error:
+                result = {'error': '{0}: {1}'.format(
+                    type(error).__name__, error)}
+            data = json.dumps(result)
+            while data:
+                data = data[os.write(write_fd, data):]
+            status = 0
+        finally:
+            os._exit(status)
+
+    os.close(write_fd)
+    chunks = []
+    try:
+        while True:
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+        _, status = os.waitpid(pid, 0)
+
+    if os.WIFSIGNALED(status):
+        return {'error': 'child killed by signal {0}'.format(
+            os.WTERMSIG(status))}
+    if os.WEXITSTATUS(status) or not chunks:
+        return {'error': 'child exited with status {0}'.format(
+            os.WEXITSTATUS(status))}
+    try:
+        return json.loads(''.join(chunks))
+    except ValueError as error:
+        return {'error': 'unreadable child result: {0}'.format(error)}
+
+
+def build_graph(module, stack, backend):
+    graph = module.FrameGraph(strict=False, directed=True, backend=backend)
+    for index, start in enumerate(stack[:-1]):
+        graph.add_edge(start, stack[index + 1])
+    return graph
+
+
+def run_benchmarks(stacks, depths, number, backend, out_dir):
+    for depth in depths:
+        def capture_inspect():
+            return inspect.stack()
+
+        def capture_fast():
+            return list(reversed(capture_stack()))
+
+        for phase, func in (('capture_inspect', capture_inspect),
+                            ('capture', capture_fast)):
+            result = stacks.run(depth, lambda: measure(func, number))
+            yield dict(result, phase=phase, depth=depth)
+
+        # The measured calls run in a child process; capture once here
+        stack = stacks.run(depth, lambda: list(reversed(capture_stack())))
+        for name in renderers:
+            try:
+                module = importlib.import_module(name)
+            except ImportError as error:
+                yield {'phase': 'build', 'depth': depth, 'renderer': name,
+                       'error': str(error)}
+                continue
+
+            result = measure(
+                lambda: build_graph(module, stack, backend), number)
+            yield dict(result, phase='build', depth=depth, renderer=name)
+
+            graph = build_graph(module, stack, backend)
+            if name.endswith('html'):
+                extension = 'html'
+            elif backend == frame_graph.SVG:
+                extension = 'svg'
+            else:
+                extension = 'png'
+            out = os.path.join(
+                out_dir, '{0}-{1}.{2}'.format(name, depth, extension))
+            result = measure(lambda: graph.draw(out), number)
+            yield dict(result, phase='draw', depth=depth, renderer=name,
+                       backend=graph.backend)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Time capture, graph build and draw for every renderer.')
+    parser.add_argument('-d', '--depth', type=int, action='append',
+                        help='stack depth, may be repeated')
+    parser.add_argument('-p', '--packages', type=int, default=10)
+    parser.add_argument('-m', '--modules', type=int, default=5,
+                        help='modules per package')
+    parser.add_argument('-r', '--recursion', type=int, default=5,
+                        help='length of recursive runs, 0 for none')
+    parser.add_argument('-n', '--number', type=int, default=5)
+    parser.add_argument('-b', '--backend', default=frame_graph.default_backend,
+                        choices=sorted(frame_graph.backends))
+    parser.add_argument('-o', '--out', help='write JSON lines here')
+    args = parser.parse_args(argv)
+
+    stacks = SyntheticStacks(args.packages, args.modules, args.recursion)
+    out_dir = tempfile.mkdtemp()
+    out = open(args.out, 'w') if args.out else sys.stdout
+    try:
+        for result in run_benchmarks(stacks, args.depth or [10, 100, 500],
+                                     args.number, args.backend, out_dir):
+            out.write(json.dumps(result, sort_keys=True) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        stacks.close()
+        shutil.rmtree(out_dir)
+
+if __name__ == '__main__':
+    sys.exit(main())
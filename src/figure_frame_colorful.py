@@ -1,26 +1,16 @@
-import re
 import random
-import inspect
-import hashlib
 import colorsys
-import pygraphviz as pgv
 
-path_regex = re.compile(r'site-packages\/(\S+?)\/')
+from frame_capture import capture_stack
+from frame_graph import BaseFrameGraph, path_regex
 
 
-class FrameGraph(object):
+class FrameGraph(BaseFrameGraph):
 
     def __init__(self, *args, **kwargs):
-        self._graph = pgv.AGraph(*args, **kwargs)
-        self._subgraphs = {}
-        self._num_edges = 0
+        super(FrameGraph, self).__init__(*args, **kwargs)
         self._color_mapping = {}
-
-    def _get_id_from_frame_record(self, frame_record):
-        frame, filename, _, name, _, _ = frame_record
-        firstlineno = frame.f_code.co_firstlineno
-        raw_str = '{0}:{1}:{2}'.format(filename, firstlineno, name)
-        return hashlib.sha1(raw_str).hexdigest()
+        self._subgraph_colors = {}
 
     def _generate_color(self):
         r, g, b = colorsys.hls_to_rgb(random.random(), 0.5, 0.5)
@@ -41,67 +31,75 @@ class FrameGraph(object):
             color = '#000000'
         return color
 
-    def add_edge(self, start, end):
-        self._num_edges += 1
-
-        self.add_node(start)
-        self.add_node(end)
-
-        _, _, lineno, _, _, _ = start
-
-        start_id = self._get_id_from_frame_record(start)
-        end_id = self._get_id_from_frame_record(end)
-
-        self._graph.add_edge(
-            start_id,
-            end_id,
-            label='#{0} at {1}'.format(self._num_edges, lineno)
-        )
-
-    def add_node(self, frame_record):
-        frame, filename, _, name, _, _ = frame_record
-        firstlineno = frame.f_code.co_firstlineno
-        self.add_subgraph(filename)
+    def _node_attrs(self, record):
+        attrs = super(FrameGraph, self)._node_attrs(record)
+        attrs['color'] = self._subgraph_colors[record.filename]
+        return attrs
 
-        node_id = self._get_id_from_frame_record(frame_record)
-        if node_id not in self._subgraphs[filename][1]:
-            color = self._subgraphs[filename][2]
-            self._subgraphs[filename][0].add_node(
-                node_id,
-                label='{0}:{1}'.format(firstlineno, name),
-                color=color
-            )
-            self._subgraphs[filename][1].add(node_id)
+    def _subgraph_attrs(self, name):
+        color = self._get_color_of_subgraph(name)
+        self._subgraph_colors[name] = color
+        return {'label': name, 'color': color}
 
-    def add_subgraph(self, name):
-        if name not in self._subgraphs:
-            color = self._get_color_of_subgraph(name)
 
-            subgraph = self._graph.add_subgraph(
-                name='cluster' + name,
-                label=name,
-                color=color
-            )
-            self._subgraphs[name] = (subgraph, set(), color)
-
-    def draw(self, *args, **kwargs):
-        self._graph.draw(*args, **kwargs)
-
-    def close(self):
-        self._graph.close()
-
-
-def figure_frame(out='figure.png'):
-    stack = list(reversed(inspect.stack()))
+def render_stack(stack, out):
     graph = FrameGraph(strict=False, directed=True)
 
     try:
         for index, start in enumerate(stack[:-1]):
             end = stack[index + 1]
             graph.add_edge(start, end)
+        graph.annotate_locals(stack)
 
         if out:
             graph.draw(out, prog='dot')
             graph.close()
     finally:
         del stack, graph
+
+
+def figure_frame(out='figure.png', queue=None, log=None, reducer=None,
+                 cache=None, summarizer=None):
+    # A LocalsSummarizer annotates every frame with its largest locals
+    if summarizer is not None:
+        stack = list(reversed(summarizer.capture_stack()))
+    else:
+        stack = list(reversed(capture_stack()))
+
+    # With a StackLog the stack is only appended, to be rendered offline
+    # by stack_log.py; with a RenderQueue the caller only pays for the
+    # capture, layout and file output happen in a worker process
+    if log is not None:
+        log.append(stack)
+        return
+
+    # A StackReducer keeps very deep stacks small enough to lay out
+    if reducer is not None:
+        stack = reducer(stack)
+    # A RenderCache reuses the output of an identical earlier stack
+    if cache is not None:
+        cache.render(render_stack, stack, out, queue=queue)
+    elif queue is not None:
+        queue.submit(render_stack, stack, out)
+    else:
+        render_stack(stack, out)
+
+
+def render_call_tree(tree, out):
+    graph = FrameGraph(strict=False, directed=True)
+
+    try:
+        graph.add_call_tree(tree)
+
+        if out:
+            graph.draw(out, prog='dot')
+            graph.close()
+    finally:
+        del graph
+
+
+def figure_call_tree(tree, out='profile.png', queue=None):
+    if queue is not None:
+        queue.submit(render_call_tree, tree, out)
+    else:
+        render_call_tree(tree, out)
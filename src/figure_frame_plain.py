@@ -1,74 +1,19 @@
-import inspect
-import hashlib
-import pygraphviz as pgv
+from frame_capture import capture_stack
+from frame_graph import BaseFrameGraph
 
 
-class FrameGraph(object):
+class FrameGraph(BaseFrameGraph):
+    pass
 
-    def __init__(self, *args, **kwargs):
-        self._graph = pgv.AGraph(*args, **kwargs)
-        self._subgraphs = {}
-        self._num_edges = 0
 
-    def _get_id_from_frame_record(self, frame_record):
-        frame, filename, _, name, _, _ = frame_record
-        firstlineno = frame.f_code.co_firstlineno
-        raw_str = '{0}:{1}:{2}'.format(filename, firstlineno, name)
-        return hashlib.sha1(raw_str).hexdigest()
-
-    def add_edge(self, start, end):
-        self._num_edges += 1
-
-        self.add_node(start)
-        self.add_node(end)
-
-        _, _, lineno, _, _, _ = start
-
-        start_id = self._get_id_from_frame_record(start)
-        end_id = self._get_id_from_frame_record(end)
-
-        self._graph.add_edge(
-            start_id,
-            end_id,
-            label='#{0} at {1}'.format(self._num_edges, lineno)
-        )
-
-    def add_node(self, frame_record):
-        frame, filename, _, name, _, _ = frame_record
-        firstlineno = frame.f_code.co_firstlineno
-        self.add_subgraph(filename)
-
-        node_id = self._get_id_from_frame_record(frame_record)
-        if node_id not in self._subgraphs[filename][1]:
-            self._subgraphs[filename][0].add_node(
-                node_id,
-                label='{0}:{1}'.format(firstlineno, name)
-            )
-            self._subgraphs[filename][1].add(node_id)
-
-    def add_subgraph(self, name):
-        if name not in self._subgraphs:
-            subgraph = self._graph.add_subgraph(
-                name='cluster' + name,
-                label=name
-            )
-            self._subgraphs[name] = (subgraph, set())
-
-    def draw(self, *args, **kwargs):
-        self._graph.draw(*args, **kwargs)
-
-    def close(self):
-        self._graph.close()
-
-
-def figure_frame(out='figure.png'):
-    stack = list(reversed(inspect.stack()))
+def render_stack(stack, out):
     graph = FrameGraph(strict=False, directed=True)
 
     try:
         for index, start in enumerate(stack[:-1]):
             end = stack[index + 1]
             graph.add_edge(start, end)
+        graph.annotate_locals(stack)
 
         if out:
             graph.draw(out, prog='dot')
@@ -76,3 +21,49 @@ def figure_frame(out='figure.png'):
     finally:
         del stack, graph
 
+
+def figure_frame(out='figure.png', queue=None, log=None, reducer=None,
+                 cache=None, summarizer=None):
+    # A LocalsSummarizer annotates every frame with its largest locals
+    if summarizer is not None:
+        stack = list(reversed(summarizer.capture_stack()))
+    else:
+        stack = list(reversed(capture_stack()))
+
+    # With a StackLog the stack is only appended, to be rendered offline
+    # by stack_log.py; with a RenderQueue the caller only pays for the
+    # capture, layout and file output happen in a worker process
+    if log is not None:
+        log.append(stack)
+        return
+
+    # A StackReducer keeps very deep stacks small enough to lay out
+    if reducer is not None:
+        stack = reducer(stack)
+    # A RenderCache reuses the output of an identical earlier stack
+    if cache is not None:
+        cache.render(render_stack, stack, out, queue=queue)
+    elif queue is not None:
+        queue.submit(render_stack, stack, out)
+    else:
+        render_stack(stack, out)
+
+
+def render_call_tree(tree, out):
+    graph = FrameGraph(strict=False, directed=True)
+
+    try:
+        graph.add_call_tree(tree)
+
+        if out:
+            graph.draw(out, prog='dot')
+            graph.close()
+    finally:
+        del graph
+
+
+def figure_call_tree(tree, out='profile.png', queue=None):
+    if queue is not None:
+        queue.submit(render_call_tree, tree, out)
+    else:
+        render_call_tree(tree, out)
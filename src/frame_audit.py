@@ -0,0 +1,125 @@
+import gc
+import sys
+import types
+
+from frame_capture import FrameRecord
+
+
+class RetainedFrame(object):
+
+    __slots__ = ('record', 'cycle_via', 'size')
+
+    def __init__(self, record, cycle_via, size):
+        self.record = record
+        # Name of the local that leads back to the frame, if any
+        self.cycle_via = cycle_via
+        self.size = size
+
+    def __repr__(self):
+        return '<RetainedFrame {0}:{1} {2} via={3} {4} bytes>'.format(
+            self.record.filename, self.record.lineno, self.record.name,
+            self.cycle_via, self.size)
+
+
+class FrameAudit(object):
+
+    def __init__(self, executing, generators, retained):
+        self.executing = executing
+        self.generators = generators
+        self.retained = retained
+
+    @property
+    def retained_size(self):
+        return sum(frame.size for frame in self.retained)
+
+    def format(self, limit=10):
+        lines = ['{0} executing, {1} in generators, {2} retained '
+                 '(~{3} bytes)'.format(self.executing, self.generators,
+                                       len(self.retained),
+                                       self.retained_size)]
+        for frame in sorted(self.retained, key=lambda frame: -frame.size)[
+                :limit]:
+            record = frame.record
+            lines.append('  {0}:{1} {2}{3} ~{4} bytes'.format(
+                record.filename, record.lineno, record.name,
+                ' (cycle via {0!r})'.format(frame.cycle_via)
+                if frame.cycle_via else '', frame.size))
+        return '\n'.join(lines)
+
+
+def executing_frames():
+    frames = set()
+    for frame in sys._current_frames().values():
+        while frame is not None:
+            frames.add(id(frame))
+            frame = frame.f_back
+    return frames
+
+
+def refers_to(value, frame):
+    # One level deep is enough for the usual culprits: the frame itself,
+    # a traceback, or inspect.stack() results stored in a local
+    if value is frame:
+        return True
+    if isinstance(value, types.TracebackType):
+        while value is not None:
+            if value.tb_frame is frame:
+                return True
+            value = value.tb_next
+        return False
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            if item is frame or (isinstance(item, tuple) and
+                                 item and item[0] is frame):
+                return True
+    return False
+
+
+def find_cycle(frame):
+    for name, value in frame.f_locals.items():
+        if refers_to(value, frame):
+            return name
+    return None
+
+
+def estimate_size(frame):
+    # The frame plus the shallow size of each local it keeps alive
+    size = sys.getsizeof(frame)
+    for value in frame.f_locals.values():
+        try:
+            size += sys.getsizeof(value)
+        except TypeError:
+            pass
+    return size
+
+
+def audit_frames():
+    executing = executing_frames()
+    generator_frames = set()
+    frames = []
+    for obj in gc.get_objects():
+        if isinstance(obj, types.FrameType):
+            frames.append(obj)
+        elif isinstance(obj, types.GeneratorType) and obj.gi_frame:
+            generator_frames.add(id(obj.gi_frame))
+    del obj
+
+    retained = []
+    num_executing = num_generators = 0
+    frame = None
+    try:
+        for frame in frames:
+            if id(frame) in executing:
+                num_executing += 1
+            elif id(frame) in generator_frames:
+                num_generators += 1
+            else:
+                retained.append(RetainedFrame(
+                    FrameRecord.from_frame(frame), find_cycle(frame),
+                    estimate_size(frame)))
+    finally:
+        del frames, frame
+    return FrameAudit(num_executing, num_generators, retained)
+
+if __name__ == '__main__':
+    print audit_frames().format()
@@ -0,0 +1,174 @@
+import sys
+import hashlib
+import functools
+
+
+class FrameRecord(object):
+
+    __slots__ = ('filename', 'lineno', 'name', 'firstlineno')
+
+    def __init__(self, filename, lineno, name, firstlineno):
+        self.filename = filename
+        self.lineno = lineno
+        self.name = name
+        self.firstlineno = firstlineno
+
+    @classmethod
+    def from_frame(cls, frame):
+        code = frame.f_code
+        return cls(code.co_filename, frame.f_lineno,
+                   code.co_name, code.co_firstlineno)
+
+    @classmethod
+    def from_frame_info(cls, frame_info):
+        frame, filename, lineno, name, _, _ = frame_info
+        return cls(filename, lineno, name, frame.f_code.co_firstlineno)
+
+    def __reduce__(self):
+        return (FrameRecord,
+                (self.filename, self.lineno, self.name, self.firstlineno))
+
+    def __repr__(self):
+        return '<FrameRecord {0}:{1} {2}>'.format(
+            self.filename, self.lineno, self.name)
+
+
+def to_record(record):
+    # Accept the tuples returned by inspect.stack() as well
+    if isinstance(record, FrameRecord):
+        return record
+    return FrameRecord.from_frame_info(record)
+
+
+def stack_signature(stack):
+    # Stable across processes and runs: code identity plus call line of
+    # every frame, in order
+    digest = hashlib.sha1()
+    for record in stack:
+        digest.update('{0}:{1}:{2}:{3}\n'.format(
+            record.filename, record.firstlineno, record.name, record.lineno))
+    return digest.hexdigest()[:16]
+
+
+def capture_stack(skip=0, limit=None):
+    # Same order as inspect.stack(): innermost (the caller) first
+    frame = sys._getframe(skip + 1)
+    records = []
+    try:
+        while frame is not None:
+            if limit is not None and len(records) >= limit:
+                break
+            records.append(FrameRecord.from_frame(frame))
+            frame = frame.f_back
+    finally:
+        del frame
+    return records
+
+
+class FrameHandle(object):
+    # Gives access to a live frame only while its FrameScope is open; the
+    # handle itself may outlive the scope without keeping the frame alive
+
+    __slots__ = ('_scope', '_frame')
+
+    def __init__(self, scope, frame):
+        self._scope = scope
+        self._frame = frame
+
+    def _get_frame(self):
+        if self._frame is None:
+            raise ReferenceError('the frame scope has been closed')
+        return self._frame
+
+    @property
+    def f_code(self):
+        return self._get_frame().f_code
+
+    @property
+    def f_lineno(self):
+        return self._get_frame().f_lineno
+
+    @property
+    def f_locals(self):
+        return dict(self._get_frame().f_locals)
+
+    @property
+    def f_back(self):
+        frame = self._get_frame().f_back
+        if frame is None:
+            return None
+        return self._scope._add_handle(frame)
+
+    def record(self):
+        return FrameRecord.from_frame(self._get_frame())
+
+
+class FrameScope(object):
+    # with FrameScope() as scope:
+    #     handle = scope.frame()    # the frame running the with block
+    #
+    # Every handle handed out drops its frame reference on exit, so
+    # nothing captured inside can form a frame -> locals -> frame cycle
+
+    def __init__(self, skip=0):
+        self._skip = skip
+        self._handles = []
+        self._base = None
+
+    def __enter__(self):
+        self._base = sys._getframe(self._skip + 1)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _add_handle(self, frame):
+        if self._base is None:
+            raise ReferenceError('the frame scope is not open')
+        handle = FrameHandle(self, frame)
+        self._handles.append(handle)
+        return handle
+
+    def frame(self, depth=0):
+        if self._base is None:
+            raise ReferenceError('the frame scope is not open')
+        frame = self._base
+        try:
+            for _ in range(depth):
+                frame = frame.f_back
+                if frame is None:
+                    raise ValueError('call stack is not deep enough')
+            return self._add_handle(frame)
+        finally:
+            del frame
+
+    def stack(self, limit=None):
+        if self._base is None:
+            raise ReferenceError('the frame scope is not open')
+        records = []
+        frame = self._base
+        try:
+            while frame is not None:
+                if limit is not None and len(records) >= limit:
+                    break
+                records.append(FrameRecord.from_frame(frame))
+                frame = frame.f_back
+        finally:
+            del frame
+        return records
+
+    def close(self):
+        for handle in self._handles:
+            handle._frame = None
+        self._handles = []
+        self._base = None
+
+
+def frame_scoped(func):
+    # The wrapped function gets an open FrameScope as its first argument,
+    # based at its caller, and closed as soon as it returns or raises
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with FrameScope(skip=1) as scope:
+            return func(scope, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,279 @@
+import os
+import re
+import math
+import colorsys
+import subprocess
+
+from frame_capture import to_record
+from frame_locals import format_size
+
+AGRAPH = 'agraph'
+DOT = 'dot'
+SVG = 'svg'
+
+# Used when a FrameGraph is created without an explicit backend
+default_backend = AGRAPH
+
+path_regex = re.compile(r'site-packages\/(\S+?)\/')
+
+
+def heat_color(ratio):
+    # Blue for cold nodes through to red for the hottest ones
+    r, g, b = colorsys.hls_to_rgb((1 - ratio) * 0.66, 0.5, 0.7)
+    return '#{0:02x}{1:02x}{2:02x}'.format(
+        int(r * 255), int(g * 255), int(b * 255))
+
+
+def quote(value):
+    # Same escaping graphviz applies when writing attributes: only double
+    # quotes, so label escapes like '\n' keep working
+    return '"{0}"'.format(str(value).replace('"', '\\"'))
+
+
+def format_attrs(attrs):
+    return ', '.join(
+        '{0}={1}'.format(key, quote(value))
+        for key, value in sorted(attrs.items())
+    )
+
+
+class BaseFrameGraph(object):
+
+    weight_color_attr = 'color'
+    max_penwidth = 8.0
+
+    def __init__(self, strict=False, directed=True, backend=None):
+        self.strict = strict
+        self.directed = directed
+        self.backend = backend or default_backend
+
+        # The graph is kept in plain containers so that building it costs
+        # no C-binding calls and the whole description stays picklable
+        self._graph_attrs = {}
+        self._node_defaults = {}
+        self._edge_defaults = {}
+        # (group, name) -> (attrs, [node ids]), drawn as 'cluster' + name
+        self._subgraphs = {}
+        # group -> attrs; groups (e.g. processes) are clusters of clusters
+        self._groups = {}
+        # node id -> attrs
+        self._nodes = {}
+        # [(start id, end id, attrs)]
+        self._edges = []
+        self._num_edges = 0
+        # (group, filename, firstlineno, name) -> short node id, e.g. 'n12'
+        self._node_ids = {}
+
+    def _get_id_from_frame_record(self, record, group=None):
+        return self._node_ids.get(
+            (group, record.filename, record.firstlineno, record.name))
+
+    def _node_label(self, record):
+        # Records from stack_reduce may carry their own label and a count
+        label = getattr(record, 'label', None) or '{0}:{1}'.format(
+            record.firstlineno, record.name)
+        repeat = getattr(record, 'repeat', 1)
+        if repeat > 1:
+            label = '{0} x{1}'.format(label, repeat)
+        return label
+
+    def _node_attrs(self, record):
+        return {'label': self._node_label(record)}
+
+    def _edge_attrs(self, start, end):
+        return {'label': '#{0} at {1}'.format(self._num_edges, start.lineno)}
+
+    def _subgraph_attrs(self, name):
+        return {'label': name}
+
+    def _group_attrs(self, group):
+        return {'label': 'process {0}'.format(group), 'style': 'dashed'}
+
+    def add_edge(self, start, end, group=None, label=None):
+        start = to_record(start)
+        end = to_record(end)
+        self._num_edges += 1
+
+        start_id = self.add_node(start, group)
+        end_id = self.add_node(end, group)
+
+        attrs = self._edge_attrs(start, end)
+        if label is not None:
+            attrs['label'] = label
+        self._edges.append((start_id, end_id, attrs))
+
+    def add_node(self, frame_record, group=None):
+        record = to_record(frame_record)
+        key = (group, record.filename, record.firstlineno, record.name)
+        node_id = self._node_ids.get(key)
+        if node_id is None:
+            node_id = 'n{0}'.format(len(self._node_ids))
+            self._node_ids[key] = node_id
+            self.add_subgraph(record.filename, group).append(node_id)
+            self._nodes[node_id] = self._node_attrs(record)
+        return node_id
+
+    def add_subgraph(self, name, group=None):
+        subgraph = self._subgraphs.get((group, name))
+        if subgraph is None:
+            if group is not None and group not in self._groups:
+                self._groups[group] = self._group_attrs(group)
+            subgraph = (self._subgraph_attrs(name), [])
+            self._subgraphs[(group, name)] = subgraph
+        return subgraph[1]
+
+    def add_link(self, start_id, end_id, label):
+        # An edge between existing nodes that is not a call, e.g. from the
+        # spawn site in a parent process to the child's outermost frame
+        self._num_edges += 1
+        self._edges.append(
+            (start_id, end_id, {'label': label, 'style': 'bold'}))
+
+    def add_call_tree(self, tree, group=None):
+        max_edge_hits = float(tree.max_edge_hits() or 1)
+        for start, end, hits in tree.edges.values():
+            self._num_edges += 1
+            start_id = self.add_node(start, group)
+            end_id = self.add_node(end, group)
+
+            attrs = self._edge_attrs(start, end)
+            attrs['label'] = '{0} at {1}'.format(hits, start.lineno)
+            attrs['penwidth'] = 1 + (self.max_penwidth - 1) * (
+                hits / max_edge_hits)
+            self._edges.append((start_id, end_id, attrs))
+
+        max_node_hits = float(tree.max_node_hits() or 1)
+        for record, hits in tree.nodes.values():
+            node_id = self.add_node(record, group)
+            attrs = self._nodes[node_id]
+            label = self._node_attrs(record)['label']
+            attrs['label'] = '{0}\\n{1} samples'.format(label, hits)
+            attrs[self.weight_color_attr] = heat_color(hits / max_node_hits)
+
+    def annotate_locals(self, stack, group=None):
+        # Records from a LocalsSummarizer: the label lists the largest
+        # locals, the color goes from the least to the most retained memory
+        # on a log scale, as sizes span orders of magnitude
+        summaries = {}
+        for record in stack:
+            summary = getattr(record, 'locals', None)
+            node_id = self._get_id_from_frame_record(record, group)
+            if summary is None or node_id is None:
+                continue
+            # Recursive frames share a node; keep the heaviest
+            if node_id not in summaries or \
+                    summary.size > summaries[node_id].size:
+                summaries[node_id] = summary
+        if not summaries:
+            return
+
+        max_size = math.log1p(max(
+            summary.size for summary in summaries.values())) or 1.0
+        for node_id, summary in summaries.items():
+            attrs = self._nodes[node_id]
+            lines = [attrs['label'], '{0} locals, {1}{2}'.format(
+                summary.count, '>=' if summary.truncated else '~',
+                format_size(summary.size))]
+            for name, size, text in summary.top:
+                # Keep graphviz from reading escapes inside the repr
+                lines.append('{0} {1} = {2}'.format(
+                    format_size(size), name, text.replace('\\', '\\\\')))
+            attrs['label'] = '\\n'.join(lines)
+            attrs[self.weight_color_attr] = heat_color(
+                math.log1p(summary.size) / max_size)
+
+    def iter_dot(self):
+        yield '{0}{1} {{\n'.format(
+            'strict ' if self.strict else '',
+            'digraph' if self.directed else 'graph')
+        for kind, attrs in (('graph', self._graph_attrs),
+                            ('node', self._node_defaults),
+                            ('edge', self._edge_defaults)):
+            if attrs:
+                yield '{0} [{1}];\n'.format(kind, format_attrs(attrs))
+
+        clusters = {}
+        for (group, name), subgraph in self._subgraphs.items():
+            clusters.setdefault(group, []).append((name, subgraph))
+
+        for group, subgraphs in clusters.items():
+            if group is not None:
+                yield 'subgraph {0} {{\n'.format(
+                    quote('cluster_group_{0}'.format(group)))
+                yield 'graph [{0}];\n'.format(
+                    format_attrs(self._groups[group]))
+            for name, (attrs, node_ids) in subgraphs:
+                cluster = 'cluster' + name
+                if group is not None:
+                    cluster = '{0}_{1}'.format(cluster, group)
+                yield 'subgraph {0} {{\n'.format(quote(cluster))
+                if attrs:
+                    yield 'graph [{0}];\n'.format(format_attrs(attrs))
+                for node_id in node_ids:
+                    yield '{0} [{1}];\n'.format(
+                        node_id, format_attrs(self._nodes[node_id]))
+                yield '}\n'
+            if group is not None:
+                yield '}\n'
+
+        edge_op = '->' if self.directed else '--'
+        for start_id, end_id, attrs in self._edges:
+            yield '{0} {1} {2} [{3}];\n'.format(
+                start_id, edge_op, end_id, format_attrs(attrs))
+        yield '}\n'
+
+    def to_dot(self):
+        return ''.join(self.iter_dot())
+
+    def draw(self, path, format=None, prog='dot'):
+        if format is None and isinstance(path, basestring):
+            format = os.path.splitext(path)[1][1:] or None
+        backends[self.backend](self, path, format or 'png', prog)
+
+    def close(self):
+        pass
+
+
+def draw_with_agraph(graph, path, format, prog):
+    import pygraphviz as pgv
+
+    agraph = pgv.AGraph(string=graph.to_dot())
+    try:
+        agraph.draw(path, format=format, prog=prog)
+    finally:
+        agraph.close()
+
+
+def draw_with_dot(graph, path, format, prog):
+    # One bulk write of the DOT text to the layout program
+    args = [prog, '-T' + format]
+    if isinstance(path, basestring):
+        args.extend(['-o', path])
+        stdout = None
+    else:
+        path.flush()
+        stdout = path
+    process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=stdout)
+    process.communicate(graph.to_dot())
+    if process.returncode != 0:
+        raise IOError('{0} exited with status {1}'.format(
+            prog, process.returncode))
+
+
+def draw_with_svg(graph, path, format, prog):
+    import layered_svg
+
+    if format != 'svg':
+        raise ValueError('the svg backend only writes svg, not ' + format)
+    if isinstance(path, basestring):
+        with open(path, 'wb') as svg_file:
+            layered_svg.write_svg(graph, svg_file)
+    else:
+        layered_svg.write_svg(graph, path)
+
+
+backends = {
+    AGRAPH: draw_with_agraph,
+    DOT: draw_with_dot,
+    SVG: draw_with_svg,
+}
@@ -0,0 +1,208 @@
+import sys
+import types
+import itertools
+from repr import Repr
+
+from frame_capture import FrameRecord
+
+# Never walked into: their contents are shared by the whole process, not
+# retained by one frame
+opaque_types = (types.ModuleType, types.FrameType, types.FunctionType,
+                types.BuiltinFunctionType, types.MethodType, types.CodeType,
+                type, types.ClassType)
+
+# Sliced before repr(), so only the shown prefix is ever formatted
+text_types = (str, unicode, bytearray, buffer)
+scalar_types = (bool, int, float, complex, types.NoneType)
+# Repr handlers that already walk at most maxlist/maxtuple/... items
+bounded_containers = ('tuple', 'list', 'array', 'deque')
+
+
+class LocalsSummary(object):
+
+    __slots__ = ('count', 'size', 'truncated', 'top')
+
+    def __init__(self, count, size, truncated, top):
+        self.count = count
+        # Approximate deep size; a lower bound when ``truncated``
+        self.size = size
+        self.truncated = truncated
+        # [(name, size, repr)], largest first
+        self.top = top
+
+    def __reduce__(self):
+        return (LocalsSummary,
+                (self.count, self.size, self.truncated, self.top))
+
+    def __repr__(self):
+        return '<LocalsSummary {0} locals {1}{2} bytes {3!r}>'.format(
+            self.count, '>=' if self.truncated else '~', self.size, self.top)
+
+
+class LocalsRecord(FrameRecord):
+
+    __slots__ = ('locals',)
+
+    def __init__(self, filename, lineno, name, firstlineno, locals=None):
+        super(LocalsRecord, self).__init__(
+            filename, lineno, name, firstlineno)
+        self.locals = locals
+
+    def __reduce__(self):
+        return (LocalsRecord,
+                (self.filename, self.lineno, self.name, self.firstlineno,
+                 self.locals))
+
+
+def deep_size(value, budget, seen):
+    # Visits at most ``budget`` objects; returns (size, truncated)
+    size = 0
+    visited = 0
+    truncated = False
+    pending = [value]
+    while pending and visited < budget:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        visited += 1
+        try:
+            size += sys.getsizeof(obj)
+        except TypeError:
+            continue
+
+        # islice, so a huge container costs no more than the budget left
+        left = budget - visited
+        if isinstance(obj, dict):
+            truncated = truncated or len(obj) > left
+            for key, item in itertools.islice(obj.iteritems(), left):
+                pending.append(key)
+                pending.append(item)
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            truncated = truncated or len(obj) > left
+            pending.extend(itertools.islice(obj, left))
+        elif not isinstance(obj, opaque_types):
+            attrs = getattr(obj, '__dict__', None)
+            if isinstance(attrs, dict):
+                pending.append(attrs)
+    return size, truncated or bool(pending)
+
+
+class BoundedRepr(Repr):
+    # Repr falls back to the full built-in repr() for any type without a
+    # repr_<type> method and sorts whole dicts and sets first. Here every
+    # path costs O(maxstring); anything whose __repr__ could be arbitrarily
+    # expensive is shown as '<TypeName object>'
+
+    def repr1(self, x, level):
+        if isinstance(x, text_types):
+            text = repr(x[:self.maxstring])
+            if len(x) > self.maxstring:
+                text += '...'
+            return text
+        if isinstance(x, scalar_types) or (
+                isinstance(x, long) and x.bit_length() <= 256):
+            return repr(x)
+        if isinstance(x, dict):
+            return self.repr_dict(x, level)
+        if isinstance(x, (set, frozenset)):
+            return self._repr_iterable(
+                x, level, '{0}(['.format(type(x).__name__), '])', self.maxset)
+        if type(x).__name__ in bounded_containers:
+            return Repr.repr1(self, x, level)
+        return '<{0} object>'.format(type(x).__name__)
+
+    def repr_dict(self, x, level):
+        if not x:
+            return '{}'
+        if level <= 0:
+            return '{...}'
+        pieces = [
+            '{0}: {1}'.format(self.repr1(key, level - 1),
+                              self.repr1(value, level - 1))
+            for key, value in itertools.islice(x.iteritems(), self.maxdict)
+        ]
+        if len(x) > self.maxdict:
+            pieces.append('...')
+        return '{{{0}}}'.format(', '.join(pieces))
+
+
+def short_repr(value, max_len=40):
+    reprs = BoundedRepr()
+    reprs.maxstring = reprs.maxother = max_len
+    try:
+        text = reprs.repr(value)
+    except Exception:
+        text = '<{0} object>'.format(type(value).__name__)
+    if len(text) > max_len:
+        text = text[:max_len - 3] + '...'
+    return text
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return '{0:.0f} {1}'.format(size, unit)
+        size /= 1024.0
+    return '{0:.1f} GB'.format(size)
+
+
+class LocalsSummarizer(object):
+    # Picklable, like StackReducer. Each frame gets a traversal budget
+    # shared fairly by its locals, and only the ``top`` largest get a repr
+
+    def __init__(self, top=3, budget=2000, max_repr=40):
+        self.top = top
+        self.budget = budget
+        self.max_repr = max_repr
+
+    def summarize(self, frame):
+        items = frame.f_locals.items()
+        share = max(1, self.budget // max(1, len(items)))
+        seen = set()
+        sizes = []
+        total = 0
+        truncated = False
+        for name, value in items:
+            size, cut = deep_size(value, share, seen)
+            total += size
+            truncated = truncated or cut
+            sizes.append((size, name, value))
+
+        sizes.sort(key=lambda item: -item[0])
+        top = [(name, size, short_repr(value, self.max_repr))
+               for size, name, value in sizes[:self.top]]
+        count = len(items)
+        del items, sizes
+        return LocalsSummary(count, total, truncated, top)
+
+    def capture_stack(self, skip=0, limit=None):
+        # Same as frame_capture.capture_stack, with a summary per record
+        frame = sys._getframe(skip + 1)
+        records = []
+        try:
+            while frame is not None:
+                if limit is not None and len(records) >= limit:
+                    break
+                code = frame.f_code
+                records.append(LocalsRecord(
+                    code.co_filename, frame.f_lineno, code.co_name,
+                    code.co_firstlineno, self.summarize(frame)))
+                frame = frame.f_back
+        finally:
+            del frame
+        return records
+
+
+def print_current_frame_locals(summarizer=None):
+    # The caller's frame, like inspect.currentframe() would give it
+    summarizer = summarizer or LocalsSummarizer()
+    summary = summarizer.capture_stack(1, 1)[0].locals
+    print '{0} locals, {1}{2}'.format(
+        summary.count, '>=' if summary.truncated else '~',
+        format_size(summary.size))
+    for name, size, text in summary.top:
+        print '  {0} {1} = {2}'.format(format_size(size), name, text)
+
+if __name__ == '__main__':
+    print_current_frame_locals()
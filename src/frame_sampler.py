@@ -0,0 +1,148 @@
+import sys
+import time
+import threading
+
+from frame_capture import FrameRecord
+
+
+def record_key(record):
+    return (record.filename, record.firstlineno, record.name)
+
+
+class CallTree(object):
+
+    def __init__(self):
+        self.num_samples = 0
+        # record_key -> [record, hits]
+        self.nodes = {}
+        # (caller key, call lineno, callee key) -> [caller, callee, hits]
+        self.edges = {}
+
+    def add_stack(self, stack, count=1):
+        # ``stack`` is ordered outermost first, like figure_frame() draws it
+        # A recursive function counts once per sample, not once per frame,
+        # so hits never exceed num_samples
+        self.num_samples += count
+        seen = set()
+        for record in stack:
+            key = record_key(record)
+            if key in seen:
+                continue
+            seen.add(key)
+            node = self.nodes.get(key)
+            if node is None:
+                self.nodes[key] = [record, count]
+            else:
+                node[1] += count
+
+        seen = set()
+        for index, start in enumerate(stack[:-1]):
+            end = stack[index + 1]
+            key = (record_key(start), start.lineno, record_key(end))
+            if key in seen:
+                continue
+            seen.add(key)
+            edge = self.edges.get(key)
+            if edge is None:
+                self.edges[key] = [start, end, count]
+            else:
+                edge[2] += count
+
+    def merge(self, other):
+        self.num_samples += other.num_samples
+        for key, (record, hits) in other.nodes.items():
+            node = self.nodes.get(key)
+            if node is None:
+                self.nodes[key] = [record, hits]
+            else:
+                node[1] += hits
+        for key, (start, end, hits) in other.edges.items():
+            edge = self.edges.get(key)
+            if edge is None:
+                self.edges[key] = [start, end, hits]
+            else:
+                edge[2] += hits
+
+    def max_node_hits(self):
+        return max([hits for _, hits in self.nodes.values()] or [0])
+
+    def max_edge_hits(self):
+        return max([hits for _, _, hits in self.edges.values()] or [0])
+
+
+def walk_frame(frame, max_depth=None):
+    # Returns the stack outermost first, keeping the innermost frames
+    # when it is deeper than ``max_depth``
+    records = []
+    try:
+        while frame is not None:
+            if max_depth is not None and len(records) >= max_depth:
+                break
+            records.append(FrameRecord.from_frame(frame))
+            frame = frame.f_back
+    finally:
+        del frame
+    records.reverse()
+    return records
+
+
+class Sampler(object):
+
+    def __init__(self, interval=0.01, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.overhead = 0.0
+        self._tree = CallTree()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='frame-sampler')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def sample(self):
+        started = time.time()
+        own_ident = threading.current_thread().ident
+        frames = sys._current_frames()
+        try:
+            stacks = [
+                walk_frame(frame, self.max_depth)
+                for ident, frame in frames.items() if ident != own_ident
+            ]
+        finally:
+            del frames
+
+        with self._lock:
+            for stack in stacks:
+                self._tree.add_stack(stack)
+        self.overhead += time.time() - started
+
+    def snapshot(self, reset=False):
+        tree = CallTree()
+        with self._lock:
+            tree.merge(self._tree)
+            if reset:
+                self._tree = CallTree()
+        return tree
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
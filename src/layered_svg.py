@@ -0,0 +1,140 @@
+import cgi
+
+char_width = 7
+line_height = 16
+node_padding = 12
+layer_gap = 60
+column_gap = 30
+margin = 20
+
+
+def escape(value):
+    return cgi.escape(str(value), quote=True)
+
+
+def assign_layers(graph):
+    # Good enough for call stacks, which are (nearly) linear: every callee
+    # goes one layer below the first caller it was seen with
+    layers = {}
+    for start_id, end_id, _ in graph._edges:
+        if start_id not in layers:
+            layers[start_id] = 0
+        if end_id not in layers:
+            layers[end_id] = layers[start_id] + 1
+    for node_id in graph._nodes:
+        layers.setdefault(node_id, 0)
+    return layers
+
+
+def node_size(attrs):
+    lines = str(attrs.get('label', '')).split('\\n')
+    width = max(len(line) for line in lines) * char_width + 2 * node_padding
+    height = len(lines) * line_height + node_padding
+    return width, height, lines
+
+
+def layout(graph):
+    rows = {}
+    for node_id, layer in sorted(assign_layers(graph).items(),
+                                 key=lambda item: (item[1], int(item[0][1:]))):
+        rows.setdefault(layer, []).append(node_id)
+
+    positions = {}
+    width = 0
+    y = margin
+    for layer in sorted(rows):
+        x = margin
+        row_height = 0
+        for node_id in rows[layer]:
+            node_width, node_height, lines = node_size(graph._nodes[node_id])
+            positions[node_id] = (x, y, node_width, node_height, lines)
+            x += node_width + column_gap
+            row_height = max(row_height, node_height)
+        width = max(width, x - column_gap + margin)
+        y += row_height + layer_gap
+    height = y - layer_gap + margin
+
+    if graph._graph_attrs.get('rankdir') == 'BT':
+        for node_id, (x, y, w, h, lines) in positions.items():
+            positions[node_id] = (x, height - y - h, w, h, lines)
+    return positions, width, height
+
+
+def write_svg(graph, out):
+    positions, width, height = layout(graph)
+    graph_attrs = graph._graph_attrs
+    node_defaults = graph._node_defaults
+    edge_defaults = graph._edge_defaults
+    font_color = node_defaults.get('fontcolor', 'black')
+
+    write = out.write
+    write('<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n')
+    write('<svg width="{0}pt" height="{1}pt" viewBox="0 0 {0} {1}" '
+          'xmlns="http://www.w3.org/2000/svg" '
+          'xmlns:xlink="http://www.w3.org/1999/xlink">\n'.format(
+              width, height))
+    write('<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" '
+          'markerWidth="8" markerHeight="8" orient="auto">'
+          '<path d="M0,0 L10,5 L0,10" fill="none" stroke="{0}"/>'
+          '</marker></defs>\n'.format(
+              escape(edge_defaults.get('color', 'black'))))
+    write('<g id="graph0" class="graph">\n<title></title>\n')
+    write('<rect width="100%" height="100%" fill="{0}"/>\n'.format(
+        escape(graph_attrs.get('bgcolor', 'white'))))
+
+    for start_id, end_id, attrs in graph._edges:
+        x1, y1, w1, h1, _ = positions[start_id]
+        x2, y2, w2, h2, _ = positions[end_id]
+        start_x, end_x = x1 + w1 / 2, x2 + w2 / 2
+        if y2 > y1:
+            start_y, end_y = y1 + h1, y2
+        else:
+            start_y, end_y = y1, y2 + h2
+        color = attrs.get('color', edge_defaults.get('color', 'black'))
+        dash = ' stroke-dasharray="5,2"' if (
+            attrs.get('style', edge_defaults.get('style')) == 'dashed') else ''
+        write('<g class="{0}">\n<title>{1}</title>\n'.format(
+            escape(edge_defaults.get('class', 'edge')),
+            escape(attrs.get('tooltip', ''))))
+        write('<g><line x1="{0}" y1="{1}" x2="{2}" y2="{3}" stroke="{4}" '
+              'stroke-width="{5}"{6} marker-end="url(#arrow)"/></g>\n'.format(
+                  start_x, start_y, end_x, end_y, escape(color),
+                  attrs.get('penwidth', 1), dash))
+        label = attrs.get('label')
+        if label:
+            text = '<text x="{0}" y="{1}" font-family="{2}" font-size="{3}" ' \
+                   'fill="{4}">{5}</text>'.format(
+                       (start_x + end_x) / 2 + 4, (start_y + end_y) / 2,
+                       escape(edge_defaults.get('fontname', 'Courier')),
+                       escape(edge_defaults.get('fontsize', 12)),
+                       escape(edge_defaults.get('fontcolor', 'black')),
+                       escape(label))
+            if 'labelURL' in attrs:
+                text = '<a xlink:href="{0}">{1}</a>'.format(
+                    escape(attrs['labelURL']), text)
+            write(text + '\n')
+        write('</g>\n')
+
+    for node_id, (x, y, w, h, lines) in sorted(positions.items()):
+        attrs = graph._nodes[node_id]
+        fill = attrs.get('fillcolor', 'none')
+        stroke = attrs.get('color', node_defaults.get('color', 'black'))
+        node = ['<rect x="{0}" y="{1}" width="{2}" height="{3}" rx="6" '
+                'fill="{4}" stroke="{5}"/>'.format(
+                    x, y, w, h, escape(fill), escape(stroke))]
+        for index, line in enumerate(lines):
+            node.append(
+                '<text x="{0}" y="{1}" text-anchor="middle" '
+                'font-family="{2}" font-size="14" fill="{3}">{4}</text>'
+                .format(x + w / 2, y + node_padding + (index + 0.75) *
+                        line_height - node_padding / 2,
+                        escape(node_defaults.get('fontname', 'Helvetica')),
+                        escape(font_color), escape(line)))
+        body = ''.join(node)
+        if 'URL' in attrs:
+            body = '<a xlink:href="{0}">{1}</a>'.format(
+                escape(attrs['URL']), body)
+        write('<g id="{0}" class="node"><title>{1}</title>{2}</g>\n'.format(
+            node_id, escape(attrs.get('tooltip', '')), body))
+
+    write('</g>\n</svg>\n')
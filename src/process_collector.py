@@ -0,0 +1,266 @@
+import os
+import sys
+import time
+import marshal
+import threading
+import multiprocessing
+from multiprocessing.util import Finalize
+from multiprocessing.connection import Listener, Client
+
+from frame_capture import FrameRecord, capture_stack
+from frame_sampler import CallTree, walk_frame
+
+# Message kinds, sent as marshal'ed tuples of plain ints and strings
+HELLO = 0
+CODES = 1
+STACKS = 2
+
+# Threads of our own that sample() leaves out
+collector_threads = ('stack-collector', 'stack-reader', 'stack-reporter',
+                     'stack-sampler')
+
+
+def encode_stack(stack):
+    return [(record.filename, record.lineno, record.name, record.firstlineno)
+            for record in stack]
+
+
+def decode_stack(raw_stack):
+    return [FrameRecord(*raw) for raw in raw_stack]
+
+
+class ChildReporter(object):
+    # Lives in a child process: folds stacks locally and sends them to the
+    # parent in batches, so the cost per sample is a dict update
+
+    def __init__(self, address, spawn_site, flush_interval=0.5):
+        self.flush_interval = flush_interval
+        self._conn = Client(address)
+        # (filename, firstlineno, name) -> small int, sent once per code
+        self._code_ids = {}
+        self._new_codes = []
+        # ((code id, lineno), ...) -> count
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._send(HELLO, os.getpid(), os.getppid(), spawn_site)
+
+        self._flusher = threading.Thread(
+            target=self._run, name='stack-reporter')
+        self._flusher.daemon = True
+        self._flusher.start()
+        # Send whatever is left when the child process exits normally
+        Finalize(self, self.flush, exitpriority=10)
+
+    def _send(self, *message):
+        self._conn.send_bytes(marshal.dumps(message))
+
+    def _code_id(self, record):
+        key = (record.filename, record.firstlineno, record.name)
+        code_id = self._code_ids.get(key)
+        if code_id is None:
+            code_id = len(self._code_ids)
+            self._code_ids[key] = code_id
+            self._new_codes.append((code_id,) + key)
+        return code_id
+
+    def record(self, stack, count=1):
+        with self._lock:
+            key = tuple(
+                (self._code_id(record), record.lineno) for record in stack)
+            self._pending[key] = self._pending.get(key, 0) + count
+
+    def flush(self):
+        with self._lock:
+            new_codes, self._new_codes = self._new_codes, []
+            pending, self._pending = self._pending, {}
+        if new_codes:
+            self._send(CODES, os.getpid(), new_codes)
+        if pending:
+            self._send(STACKS, os.getpid(), pending.items())
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except (IOError, EOFError):
+                break
+
+
+class StackCollector(object):
+
+    def __init__(self, flush_interval=0.5):
+        self.flush_interval = flush_interval
+        self.parent_pid = os.getpid()
+        # pid -> CallTree
+        self.trees = {}
+        # child pid -> (parent pid, spawn site stack, outermost first)
+        self.spawn_sites = {}
+        self._codes = {}
+        self._lock = threading.Lock()
+        self._spawn_site = None
+        self._reporter = None
+        self._reporter_pid = None
+
+        self._listener = Listener(family='AF_UNIX')
+        self.address = self._listener.address
+        self._acceptor = threading.Thread(
+            target=self._accept, name='stack-collector')
+        self._acceptor.daemon = True
+        self._acceptor.start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except (IOError, OSError, EOFError):
+                break
+            reader = threading.Thread(
+                target=self._read, args=(conn,), name='stack-reader')
+            reader.daemon = True
+            reader.start()
+
+    def _read(self, conn):
+        try:
+            while True:
+                self._handle(marshal.loads(conn.recv_bytes()))
+        except (IOError, EOFError):
+            pass
+        finally:
+            conn.close()
+
+    def _handle(self, message):
+        kind, pid = message[0], message[1]
+        with self._lock:
+            if kind == HELLO:
+                _, _, ppid, spawn_site = message
+                self.spawn_sites[pid] = (ppid, decode_stack(spawn_site))
+            elif kind == CODES:
+                for code_id, filename, firstlineno, name in message[2]:
+                    self._codes[(pid, code_id)] = (
+                        filename, firstlineno, name)
+            elif kind == STACKS:
+                tree = self.trees.setdefault(pid, CallTree())
+                codes = self._codes
+                for raw_stack, count in message[2]:
+                    stack = []
+                    for code_id, lineno in raw_stack:
+                        filename, firstlineno, name = codes[(pid, code_id)]
+                        stack.append(
+                            FrameRecord(filename, lineno, name, firstlineno))
+                    tree.add_stack(stack, count)
+
+    def _get_reporter(self):
+        # A forked child inherits the parent's reporter attributes, so
+        # compare pids to tell whether this process already connected
+        pid = os.getpid()
+        if self._reporter_pid != pid:
+            self._reporter = ChildReporter(
+                self.address, encode_stack(self._spawn_site or []),
+                self.flush_interval)
+            self._reporter_pid = pid
+        return self._reporter
+
+    def record(self, stack=None, count=1):
+        # ``stack`` is ordered outermost first; defaults to the caller's
+        if stack is None:
+            stack = list(reversed(capture_stack(1)))
+        if os.getpid() == self.parent_pid:
+            with self._lock:
+                tree = self.trees.setdefault(self.parent_pid, CallTree())
+                tree.add_stack(stack, count)
+        else:
+            self._get_reporter().record(stack, count)
+
+    def sample(self, max_depth=64):
+        # All threads of the current process except the calling one and the
+        # collector's own
+        skipped = set(
+            thread.ident for thread in threading.enumerate()
+            if thread.name in collector_threads)
+        skipped.add(threading.current_thread().ident)
+        frames = sys._current_frames()
+        try:
+            stacks = [
+                walk_frame(frame, max_depth)
+                for ident, frame in frames.items() if ident not in skipped
+            ]
+        finally:
+            del frames
+        for stack in stacks:
+            self.record(stack)
+
+    def start_sampling(self, interval=0.01, max_depth=64):
+        # Threads do not survive fork, so call this in every child, e.g.
+        # from a Pool initializer
+        def run():
+            while True:
+                time.sleep(interval)
+                self.sample(max_depth)
+
+        sampler = threading.Thread(target=run, name='stack-sampler')
+        sampler.daemon = True
+        sampler.start()
+
+    def flush(self):
+        if self._reporter_pid == os.getpid():
+            self._reporter.flush()
+
+    def mark_spawn_site(self, skip=0):
+        # Children forked after this call report the caller as spawn site
+        self._spawn_site = list(reversed(capture_stack(skip + 1)))
+
+    def process(self, *args, **kwargs):
+        self.mark_spawn_site(1)
+        return multiprocessing.Process(*args, **kwargs)
+
+    def pool(self, *args, **kwargs):
+        self.mark_spawn_site(1)
+        return multiprocessing.Pool(*args, **kwargs)
+
+    def snapshot(self):
+        with self._lock:
+            trees = {}
+            for pid, tree in self.trees.items():
+                trees[pid] = CallTree()
+                trees[pid].merge(tree)
+            return trees, dict(self.spawn_sites)
+
+    def close(self):
+        self._listener.close()
+
+
+def roots_of(tree):
+    callees = set(end_key for _, _, end_key in tree.edges)
+    return [record for key, (record, _) in tree.nodes.items()
+            if key not in callees]
+
+
+def add_processes(graph, trees, spawn_sites):
+    for pid, tree in sorted(trees.items()):
+        graph.add_call_tree(tree, group=pid)
+
+    for pid, (ppid, spawn_site) in sorted(spawn_sites.items()):
+        if pid not in trees or not spawn_site:
+            continue
+        for index, start in enumerate(spawn_site[:-1]):
+            graph.add_edge(start, spawn_site[index + 1], group=ppid)
+        spawn_id = graph.add_node(spawn_site[-1], group=ppid)
+        for root in roots_of(trees[pid]):
+            graph.add_link(
+                spawn_id, graph.add_node(root, group=pid),
+                'spawn {0}'.format(pid))
+
+
+def figure_processes(collector, graph_cls, out='processes.png'):
+    trees, spawn_sites = collector.snapshot()
+    graph = graph_cls(strict=False, directed=True)
+
+    try:
+        add_processes(graph, trees, spawn_sites)
+
+        if out:
+            graph.draw(out)
+            graph.close()
+    finally:
+        del graph
@@ -0,0 +1,242 @@
+import os
+import errno
+import shutil
+import hashlib
+import time
+import tempfile
+import threading
+import collections
+
+from frame_capture import stack_signature
+
+# Renders in progress, skipped when the cache directory is loaded
+temp_prefix = '.rendering-'
+
+
+def cache_key(stack, render_func, extension, args=()):
+    # Same stack, renderer, format and options -> same output file
+    digest = hashlib.sha1('{0}\n{1}.{2}\n{3}\n{4!r}'.format(
+        stack_signature(stack), render_func.__module__, render_func.__name__,
+        extension, args))
+    # Locals summaries change the labels, not the signature
+    for record in stack:
+        summary = getattr(record, 'locals', None)
+        if summary is not None:
+            digest.update(repr(summary))
+    return digest.hexdigest()
+
+
+def remove_if_exists(path):
+    try:
+        os.remove(path)
+    except OSError as error:
+        if error.errno != errno.ENOENT:
+            raise
+
+
+def link_or_copy(source, destination):
+    # ``destination`` is replaced, never written through: it may be a hard
+    # link to another cache entry
+    remove_if_exists(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        # Across filesystems, or where hard links are not supported
+        shutil.copyfile(source, destination)
+
+
+def render_to_cache(cache_dir, key, render_func, stack, out, args=()):
+    # Module level, so a RenderQueue worker can run it; the parent picks
+    # the cached file up from disk on its next lookup. The output is
+    # rendered to a temporary file and renamed into the cache, so ``out``
+    # (possibly linked to an older entry) is never written to and a
+    # lookup never sees a partial file
+    extension = os.path.splitext(out)[1]
+    fd, temp_path = tempfile.mkstemp(
+        suffix=extension, prefix=temp_prefix, dir=cache_dir)
+    os.close(fd)
+    try:
+        render_func(stack, temp_path, *args)
+        path = os.path.join(cache_dir, key + extension)
+        os.rename(temp_path, path)
+    except BaseException:
+        remove_if_exists(temp_path)
+        raise
+    link_or_copy(path, out)
+    return path
+
+
+class RenderCache(object):
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024,
+                 max_memory_bytes=16 * 1024 * 1024, max_memory_item=512 * 1024,
+                 pending_timeout=600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.max_memory_item = max_memory_item
+        # Seconds to wait for a worker's render before giving up on it
+        self.pending_timeout = pending_timeout
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.abandoned = 0
+
+        # file name -> size on disk, least recently used first
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        # file name -> content, for small outputs only
+        self._memory = collections.OrderedDict()
+        self._memory_size = 0
+        # file name -> submit time, for renders handed to RenderQueue
+        # workers; a failed render never shows up, so names expire
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        self._load()
+
+    def _load(self):
+        names = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(temp_prefix):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            names.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(names):
+            self._entries[name] = size
+            self._size += size
+
+    def _discover(self, name):
+        # Caller holds the lock. Accounts for a file written by another
+        # process, e.g. a RenderQueue worker, and keeps the size cap
+        try:
+            size = os.path.getsize(os.path.join(self.cache_dir, name))
+        except OSError:
+            return False
+        self._pending.pop(name, None)
+        self._entries[name] = size
+        self._size += size
+        self._evict()
+        return True
+
+    def _collect_pending(self):
+        now = time.time()
+        for name, submitted in self._pending.items():
+            if name in self._entries:
+                del self._pending[name]
+            elif not self._discover(name) and \
+                    now - submitted >= self.pending_timeout:
+                del self._pending[name]
+                self.abandoned += 1
+
+    def _lookup(self, name):
+        # Caller holds the lock
+        size = self._entries.pop(name, None)
+        if size is None:
+            return self._discover(name)
+        self._entries[name] = size
+        return True
+
+    def _remember(self, name, path):
+        size = os.path.getsize(path)
+        if size > self.max_memory_item:
+            return
+        with open(path, 'rb') as cached_file:
+            content = cached_file.read()
+        self._memory[name] = content
+        self._memory_size += size
+        while self._memory_size > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _add(self, name):
+        path = os.path.join(self.cache_dir, name)
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._size -= size
+        size = os.path.getsize(path)
+        self._entries[name] = size
+        self._size += size
+        self._remember(name, path)
+        self._evict()
+
+    def _evict(self):
+        # Caller holds the lock; the most recent entry is always kept
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            evicted, evicted_size = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            content = self._memory.pop(evicted, None)
+            if content is not None:
+                self._memory_size -= len(content)
+            try:
+                os.remove(os.path.join(self.cache_dir, evicted))
+            except OSError:
+                pass
+            self.evictions += 1
+
+    def fetch(self, key, out):
+        # Puts the cached output for ``key`` at ``out``; False on a miss
+        name = key + os.path.splitext(out)[1]
+        with self._lock:
+            self._collect_pending()
+            content = self._memory.get(name)
+            if content is not None:
+                self._memory[name] = self._memory.pop(name)
+                self._entries[name] = self._entries.pop(name)
+                self.hits += 1
+                self.memory_hits += 1
+            elif self._lookup(name):
+                self.hits += 1
+            else:
+                self.misses += 1
+                return False
+
+        if content is not None:
+            remove_if_exists(out)
+            with open(out, 'wb') as out_file:
+                out_file.write(content)
+        else:
+            link_or_copy(os.path.join(self.cache_dir, name), out)
+        return True
+
+    def render(self, render_func, stack, out, *args, **kwargs):
+        # Renders through ``render_func(stack, out, *args)`` unless an
+        # identical output is cached. With ``queue`` a miss is rendered by
+        # a worker, and becomes a hit once the worker has written it
+        queue = kwargs.pop('queue', None)
+        key = cache_key(stack, render_func, os.path.splitext(out)[1], args)
+        if self.fetch(key, out):
+            return True
+
+        if queue is not None:
+            name = key + os.path.splitext(out)[1]
+            with self._lock:
+                self._pending[name] = time.time()
+            if not queue.submit(render_to_cache, self.cache_dir, key,
+                                render_func, stack, out, args):
+                with self._lock:
+                    self._pending.pop(name, None)
+        else:
+            path = render_to_cache(
+                self.cache_dir, key, render_func, stack, out, args)
+            with self._lock:
+                self._add(os.path.basename(path))
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'memory_hits': self.memory_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'abandoned': self.abandoned,
+                'pending': len(self._pending),
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'memory_bytes': self._memory_size,
+            }
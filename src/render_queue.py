@@ -0,0 +1,171 @@
+import time
+import traceback
+import threading
+import collections
+import multiprocessing
+
+DROP_NEWEST = 'drop-newest'
+DROP_OLDEST = 'drop-oldest'
+BLOCK = 'block'
+
+# Tells the feeder thread to exit
+_stop = object()
+
+
+def _worker(tasks, rendered, failed, render_time):
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        func, args = task
+        started = time.time()
+        try:
+            func(*args)
+        except Exception:
+            traceback.print_exc()
+            with failed.get_lock():
+                failed.value += 1
+        else:
+            with rendered.get_lock():
+                rendered.value += 1
+        finally:
+            with render_time.get_lock():
+                render_time.value += time.time() - started
+
+
+class RenderQueue(object):
+
+    def __init__(self, processes=2, maxsize=64, policy=DROP_NEWEST,
+                 timeout=None):
+        if policy not in (DROP_NEWEST, DROP_OLDEST, BLOCK):
+            raise ValueError('unknown drop policy: {0}'.format(policy))
+
+        self.policy = policy
+        self.timeout = timeout
+        self.submitted = 0
+        self.dropped = 0
+        self.submit_time = 0.0
+        self.closed = False
+
+        # Waiting tasks stay in a local deque, where the oldest can still be
+        # dropped; a multiprocessing.Queue cannot take back what its feeder
+        # thread has buffered. One thread hands them to the workers
+        self.maxsize = maxsize
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._tasks = multiprocessing.Queue(processes)
+        self._rendered = multiprocessing.Value('i', 0)
+        self._failed = multiprocessing.Value('i', 0)
+        self._render_time = multiprocessing.Value('d', 0.0)
+        self._workers = []
+        for _ in range(processes):
+            worker = multiprocessing.Process(
+                target=_worker,
+                args=(self._tasks, self._rendered, self._failed,
+                      self._render_time)
+            )
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+        self._feeder = threading.Thread(target=self._feed)
+        self._feeder.daemon = True
+        self._feeder.start()
+
+    def _feed(self):
+        while True:
+            with self._not_empty:
+                while not self._pending:
+                    self._not_empty.wait()
+                task = self._pending.popleft()
+                self._not_full.notify()
+            if task is _stop:
+                break
+            # Blocks while every worker is busy and the pipe is full
+            self._tasks.put(task)
+
+    def submit(self, func, *args):
+        # ``func`` and ``args`` must be picklable; frames are not, so pass
+        # FrameRecord lists or CallTree objects rather than inspect tuples
+        started = time.time()
+        try:
+            return self._put((func, args))
+        finally:
+            elapsed = time.time() - started
+            with self._lock:
+                self.submit_time += elapsed
+
+    def _put(self, task):
+        with self._not_full:
+            if self.closed:
+                raise ValueError('the render queue is closed')
+            if len(self._pending) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                elif self.policy == DROP_OLDEST:
+                    self._pending.popleft()
+                    self.dropped += 1
+                else:
+                    deadline = None
+                    if self.timeout is not None:
+                        deadline = time.time() + self.timeout
+                    while len(self._pending) >= self.maxsize:
+                        if self.closed:
+                            raise ValueError('the render queue is closed')
+                        if deadline is None:
+                            self._not_full.wait()
+                            continue
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            self.dropped += 1
+                            return False
+                        self._not_full.wait(remaining)
+            self._pending.append(task)
+            self._not_empty.notify()
+            self.submitted += 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            submitted = self.submitted
+            dropped = self.dropped
+            pending = len(self._pending)
+            submit_time = self.submit_time
+        return {
+            'submitted': submitted,
+            'dropped': dropped,
+            'pending': pending,
+            'rendered': self._rendered.value,
+            'failed': self._failed.value,
+            'avg_submit_latency': submit_time / (submitted or 1),
+            'render_time': self._render_time.value,
+        }
+
+    def close(self, wait=True):
+        # Pending tasks are still rendered first; later submits are refused
+        with self._not_empty:
+            if self.closed:
+                return
+            self.closed = True
+            self._pending.extend([None] * len(self._workers))
+            self._pending.append(_stop)
+            self._not_empty.notify_all()
+            # Wake submitters blocked on a full queue, so they see it closed
+            self._not_full.notify_all()
+        if wait:
+            self._feeder.join()
+            for worker in self._workers:
+                worker.join()
+            # Stops multiprocessing's own feeder thread once it has flushed
+            self._tasks.close()
+            self._tasks.join_thread()
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,150 @@
+import os
+import time
+import functools
+import traceback
+import threading
+import importlib
+import collections
+
+from frame_capture import FrameRecord, capture_stack, stack_signature
+
+
+class TokenBucket(object):
+
+    def __init__(self, rate=1.0 / 60, capacity=5):
+        # ``rate`` tokens per second, at most ``capacity`` saved up
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            now = time.time()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+# Shared by every SlowCallCapture that is not given its own budget
+process_budget = TokenBucket()
+
+
+class SlowCallCapture(object):
+    # As a decorator:       @SlowCallCapture(threshold=0.5)
+    # As a context manager: with SlowCallCapture(threshold=0.5): ...
+    #
+    # The stack is captured only when the call took longer than
+    # ``threshold`` seconds, rendered once per distinct stack signature and
+    # only while the token budget allows
+
+    def __init__(self, threshold=0.5, renderer='figure_frame_colorful',
+                 out_dir='.', budget=None, max_signatures=1024,
+                 reducer=None, queue=None, extension=None):
+        self.threshold = threshold
+        self.renderer = renderer
+        self.out_dir = out_dir
+        self.budget = budget or process_budget
+        self.max_signatures = max_signatures
+        self.reducer = reducer
+        self.queue = queue
+        if extension is None:
+            extension = 'html' if renderer.endswith('html') else 'png'
+        self.extension = extension
+
+        self.slow_calls = 0
+        self.duplicates = 0
+        self.throttled = 0
+        self.captured = 0
+        self.errors = 0
+
+        self._signatures = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __call__(self, func):
+        code = func.__code__
+        callee = FrameRecord(code.co_filename, code.co_firstlineno,
+                             code.co_name, code.co_firstlineno)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.time() - started
+                if elapsed >= self.threshold:
+                    self._capture(callee)
+        return wrapper
+
+    def __enter__(self):
+        starts = getattr(self._local, 'starts', None)
+        if starts is None:
+            starts = self._local.starts = []
+        starts.append(time.time())
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.time() - self._local.starts.pop()
+        if elapsed >= self.threshold:
+            self._capture()
+
+    def _capture(self, callee=None):
+        # Never lets a capture or render failure replace the measured
+        # call's return value or the exception it is raising
+        try:
+            self._on_slow_call(callee)
+        except Exception:
+            traceback.print_exc()
+            with self._lock:
+                self.errors += 1
+
+    def _on_slow_call(self, callee=None):
+        # Skip this method, _capture and the wrapper or __exit__
+        stack = list(reversed(capture_stack(3)))
+        if callee is not None:
+            stack.append(callee)
+        if self.reducer is not None:
+            stack = self.reducer(stack)
+        signature = stack_signature(stack)
+
+        with self._lock:
+            self.slow_calls += 1
+            if signature in self._signatures:
+                # Move to the end, so eviction drops the least recent
+                self._signatures[signature] = \
+                    self._signatures.pop(signature) + 1
+                self.duplicates += 1
+                return
+            if not self.budget.take():
+                self.throttled += 1
+                return
+            self._signatures[signature] = 1
+            if len(self._signatures) > self.max_signatures:
+                self._signatures.popitem(last=False)
+            self.captured += 1
+
+        module = importlib.import_module(self.renderer)
+        out = os.path.join(
+            self.out_dir, 'slow-{0}.{1}'.format(signature, self.extension))
+        if self.queue is not None:
+            self.queue.submit(module.render_stack, stack, out)
+        else:
+            module.render_stack(stack, out)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'slow_calls': self.slow_calls,
+                'duplicates': self.duplicates,
+                'throttled': self.throttled,
+                'captured': self.captured,
+                'errors': self.errors,
+                'signatures': len(self._signatures),
+            }
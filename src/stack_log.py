@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import atexit
+import argparse
+import importlib
+import threading
+
+from frame_capture import FrameRecord
+from frame_sampler import CallTree
+
+renderers = {
+    'plain': 'figure_frame_plain',
+    'colorful': 'figure_frame_colorful',
+    'html': 'figure_frame_html',
+}
+
+
+def format_frame(record):
+    return '{0}:{1}:{2}:{3}'.format(
+        record.filename, record.firstlineno, record.name, record.lineno)
+
+
+def parse_frame(token):
+    # rsplit, so filenames may contain ':' themselves
+    filename, firstlineno, name, lineno = token.rsplit(':', 3)
+    return FrameRecord(filename, int(lineno), name, int(firstlineno))
+
+
+def format_stack(stack):
+    # Collapsed-stack line without the count, outermost frame first
+    return ';'.join(format_frame(record) for record in stack)
+
+
+def parse_line(line):
+    frames, count = line.rstrip('\n').rsplit(' ', 1)
+    return [parse_frame(token) for token in frames.split(';')], int(count)
+
+
+class StackLog(object):
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, backup_count=5,
+                 buffer_size=64 * 1024, fsync_interval=1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer_size = buffer_size
+        self.fsync_interval = fsync_interval
+        # Identical stacks are folded while buffered: line -> count
+        self._pending = {}
+        self._pending_bytes = 0
+        self._last_fsync = self._last_write = time.time()
+        # Written but not yet fsynced
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._file = open(path, 'a')
+
+        # Buffered stacks reach the disk at least every ``fsync_interval``
+        # seconds even when no more are appended, and on interpreter exit
+        self._closed = threading.Event()
+        if fsync_interval:
+            flusher = threading.Thread(target=self._flush_periodically)
+            flusher.daemon = True
+            flusher.start()
+        atexit.register(self.close)
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.fsync_interval):
+            self.flush()
+
+    def append(self, stack, count=1):
+        line = format_stack(stack)
+        with self._lock:
+            if line in self._pending:
+                self._pending[line] += count
+            else:
+                self._pending[line] = count
+                self._pending_bytes += len(line) + 8
+            if self._pending_bytes >= self.buffer_size or \
+                    time.time() - self._last_write >= self.fsync_interval:
+                self._write()
+
+    def _write(self):
+        if self._pending:
+            self._file.write(''.join(
+                '{0} {1}\n'.format(line, count)
+                for line, count in self._pending.items()))
+            self._pending = {}
+            self._pending_bytes = 0
+            self._file.flush()
+            self._dirty = True
+
+        now = time.time()
+        self._last_write = now
+        if self._dirty and now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+            self._dirty = False
+
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        os.fsync(self._file.fileno())
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = '{0}.{1}'.format(self.path, index)
+            if os.path.exists(source):
+                os.rename(source, '{0}.{1}'.format(self.path, index + 1))
+        if self.backup_count > 0:
+            os.rename(self.path, self.path + '.1')
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'a')
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._write()
+
+    def close(self):
+        # Also registered with atexit, so it may run twice
+        self._closed.set()
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+def read_log(path):
+    with open(path) as log_file:
+        for line in log_file:
+            if line.strip():
+                yield parse_line(line)
+
+
+def load_logs(paths):
+    tree = CallTree()
+    for path in paths:
+        for stack, count in read_log(path):
+            tree.add_stack(stack, count)
+    return tree
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Render one or more collapsed-stack logs as one graph.')
+    parser.add_argument('logs', nargs='+')
+    parser.add_argument('-r', '--renderer', choices=sorted(renderers),
+                        default='colorful')
+    parser.add_argument('-o', '--out')
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(renderers[args.renderer])
+    out = args.out or (
+        'profile.html' if args.renderer == 'html' else 'profile.png')
+    module.render_call_tree(load_logs(args.logs), out)
+
+if __name__ == '__main__':
+    sys.exit(main())
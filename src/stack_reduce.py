@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from frame_capture import FrameRecord
+from frame_graph import path_regex
+
+
+class ReducedRecord(FrameRecord):
+    # Stands for several frames: a recursive run, a folded package or the
+    # frames elided by a node cap. ``label`` replaces 'firstlineno:name';
+    # ``locals`` is the largest LocalsSummary among those frames, if any
+
+    __slots__ = ('repeat', 'label', 'locals')
+
+    def __init__(self, filename, lineno, name, firstlineno, repeat=1,
+                 label=None, locals=None):
+        super(ReducedRecord, self).__init__(
+            filename, lineno, name, firstlineno)
+        self.repeat = repeat
+        self.label = label
+        self.locals = locals
+
+    def __reduce__(self):
+        return (ReducedRecord,
+                (self.filename, self.lineno, self.name, self.firstlineno,
+                 self.repeat, self.label, self.locals))
+
+
+def record_key(record):
+    return (record.filename, record.firstlineno, record.name)
+
+
+def repeat_of(record):
+    return getattr(record, 'repeat', 1)
+
+
+def largest_locals(records):
+    # Records from a LocalsSummarizer carry ``locals``; others do not
+    largest = None
+    for record in records:
+        summary = getattr(record, 'locals', None)
+        if summary is not None and (
+                largest is None or summary.size > largest.size):
+            largest = summary
+    return largest
+
+
+def collapse_recursion(stack, max_period=3):
+    # Replaces runs like a, a, a (or a, b, a, b for max_period >= 2) by a
+    # single pass over the block, marked with how often it repeated
+    keys = [record_key(record) for record in stack]
+    reduced = []
+    index = 0
+    while index < len(stack):
+        best_period, best_repeat = 1, 1
+        for period in range(1, max_period + 1):
+            block = keys[index:index + period]
+            if len(block) < period:
+                break
+            repeat = 1
+            while keys[index + repeat * period:
+                       index + (repeat + 1) * period] == block:
+                repeat += 1
+            if repeat > 1 and repeat * period > best_repeat * best_period:
+                best_period, best_repeat = period, repeat
+
+        if best_repeat == 1:
+            reduced.append(stack[index])
+        else:
+            # The last pass keeps the line numbers of the exit calls
+            last = index + (best_repeat - 1) * best_period
+            for offset, record in enumerate(stack[last:last + best_period]):
+                start = index + offset
+                reduced.append(ReducedRecord(
+                    record.filename, record.lineno, record.name,
+                    record.firstlineno, best_repeat * repeat_of(record),
+                    getattr(record, 'label', None), largest_locals(
+                        stack[start:last + best_period:best_period])))
+        index += best_period * best_repeat
+    return reduced
+
+
+def package_of(record):
+    match = path_regex.search(record.filename)
+    if match:
+        return match.group(1), record.filename[:match.end()]
+    return None, None
+
+
+def fold_packages(stack, packages=True):
+    # Consecutive frames inside one site-packages/<pkg>/ collapse into one
+    # node; ``packages`` is a collection of package names, or True for all
+    reduced = []
+    run = []
+    run_package = None
+
+    def flush():
+        if len(run) == 1:
+            reduced.append(run[0])
+        elif run:
+            package, prefix = package_of(run[0])
+            frames = sum(repeat_of(record) for record in run)
+            reduced.append(ReducedRecord(
+                prefix, run[-1].lineno, package, 0, 1,
+                '{0} ({1} frames)'.format(package, frames),
+                largest_locals(run)))
+
+    for record in stack:
+        package, _ = package_of(record)
+        if package is not None and packages is not True and \
+                package not in packages:
+            package = None
+        if package is None or package != run_package:
+            flush()
+            run = []
+        run_package = package
+        if package is None:
+            reduced.append(record)
+        else:
+            run.append(record)
+    flush()
+    return reduced
+
+
+def cap_nodes(stack, max_nodes):
+    # Keeps the outermost and innermost frames around one summary node
+    if len(stack) <= max_nodes:
+        return stack
+    head = (max_nodes - 1) // 2
+    tail = max_nodes - 1 - head
+    elided = stack[head:len(stack) - tail]
+    frames = sum(repeat_of(record) for record in elided)
+    summary = ReducedRecord(
+        '<elided>', elided[-1].lineno, '<elided>', 0, 1,
+        u'…{0} frames elided'.format(frames).encode('utf-8'),
+        largest_locals(elided))
+    return stack[:head] + [summary] + stack[len(stack) - tail:]
+
+
+class StackReducer(object):
+    # Picklable, so it can go through a RenderQueue along with the stack
+
+    def __init__(self, collapse=True, max_period=3, packages=None,
+                 max_nodes=None):
+        self.collapse = collapse
+        self.max_period = max_period
+        self.packages = packages
+        self.max_nodes = max_nodes
+
+    def __call__(self, stack):
+        if self.collapse:
+            stack = collapse_recursion(stack, self.max_period)
+        if self.packages:
+            stack = fold_packages(stack, self.packages)
+        if self.max_nodes:
+            stack = cap_nodes(stack, self.max_nodes)
+        return stack
@@ -0,0 +1,109 @@
+import sys
+import threading
+
+from frame_capture import FrameRecord
+
+
+class TrieNode(object):
+
+    __slots__ = ('record', 'children', 'threads')
+
+    def __init__(self, record):
+        self.record = record
+        # (code, lineno) -> TrieNode
+        self.children = {}
+        # names of the threads whose stack passes through this frame
+        self.threads = []
+
+
+class StackTrie(object):
+    # Stacks merged by common prefix: frames shared by many threads (server
+    # loop, dispatcher) are stored once, then branch per thread
+
+    def __init__(self):
+        self.root = TrieNode(None)
+        self.num_threads = 0
+
+    def insert(self, codes, thread_name):
+        # ``codes`` is [(code, lineno), ...], outermost first
+        self.num_threads += 1
+        node = self.root
+        for key in codes:
+            child = node.children.get(key)
+            if child is None:
+                code, lineno = key
+                child = TrieNode(FrameRecord(
+                    code.co_filename, lineno, code.co_name,
+                    code.co_firstlineno))
+                node.children[key] = child
+            child.threads.append(thread_name)
+            node = child
+
+    def edges(self):
+        # (caller, callee, thread names) for every parent/child pair
+        pending = list(self.root.children.values())
+        while pending:
+            node = pending.pop()
+            for child in node.children.values():
+                yield node.record, child.record, child.threads
+                pending.append(child)
+
+
+def snapshot_threads(max_depth=None, skip_current=True):
+    # Only (code, lineno) pairs are read while walking the frames; records
+    # are built afterwards, once per distinct trie node
+    names = dict(
+        (thread.ident, thread.name) for thread in threading.enumerate())
+    own_ident = threading.current_thread().ident
+
+    stacks = []
+    frame = None
+    frames = sys._current_frames()
+    try:
+        for ident, frame in frames.items():
+            if skip_current and ident == own_ident:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append((frame.f_code, frame.f_lineno))
+                frame = frame.f_back
+            codes.reverse()
+            # Cut from the inner end: the outer frames are the prefix the
+            # threads share and the trie merges
+            if max_depth is not None:
+                del codes[max_depth:]
+            stacks.append((names.get(ident, str(ident)), codes))
+    finally:
+        del frames, frame
+
+    trie = StackTrie()
+    for name, codes in sorted(stacks, key=lambda item: item[0]):
+        trie.insert(codes, name)
+    return trie
+
+
+def thread_label(threads, lineno, max_names=3):
+    if len(threads) > max_names:
+        who = '{0} threads'.format(len(threads))
+    else:
+        who = ', '.join(threads)
+    return '{0} at {1}'.format(who, lineno)
+
+
+def add_thread_trie(graph, trie):
+    for start, end, threads in trie.edges():
+        graph.add_edge(start, end, label=thread_label(threads, start.lineno))
+
+
+def figure_threads(graph_cls, out='threads.png', max_depth=None):
+    trie = snapshot_threads(max_depth)
+    graph = graph_cls(strict=False, directed=True)
+
+    try:
+        add_thread_trie(graph, trie)
+
+        if out:
+            graph.draw(out)
+            graph.close()
+    finally:
+        del trie, graph
@@ -0,0 +1,116 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from frame_capture import FrameRecord
+from render_cache import RenderCache
+
+
+def render_name(stack, out, size=16):
+    # Stands in for a renderer: the output names the innermost frame
+    with open(out, 'wb') as out_file:
+        out_file.write('graph of {0}'.format(stack[-1].name).ljust(size))
+
+
+def read(path):
+    with open(path, 'rb') as in_file:
+        return in_file.read().rstrip()
+
+
+class InlineQueue(object):
+    # Runs each task at once, standing in for a RenderQueue worker
+
+    def submit(self, func, *args):
+        func(*args)
+        return True
+
+
+class LostQueue(object):
+    # Accepts every task and never runs it, like a worker whose render
+    # failed
+
+    def submit(self, func, *args):
+        return True
+
+
+class RenderCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        self.out = os.path.join(self.tmp_dir, 'figure.png')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def stack(self, name):
+        return [FrameRecord('main.py', 1, 'main', 1),
+                FrameRecord('main.py', 5, name, 5)]
+
+    def entry(self, cache, stack):
+        # The only cached file rendered from ``stack``
+        names = [name for name in os.listdir(cache.cache_dir)
+                 if read(os.path.join(cache.cache_dir, name)) ==
+                 'graph of {0}'.format(stack[-1].name)]
+        self.assertEqual(len(names), 1)
+        return os.path.join(cache.cache_dir, names[0])
+
+    def test_reused_out_keeps_entries_intact(self):
+        cache = RenderCache(self.cache_dir)
+        a, b = self.stack('a'), self.stack('b')
+
+        self.assertFalse(cache.render(render_name, a, self.out))
+        entry_a = self.entry(cache, a)
+        self.assertFalse(cache.render(render_name, b, self.out))
+        entry_b = self.entry(cache, b)
+        self.assertEqual(read(self.out), 'graph of b')
+        self.assertEqual(read(entry_a), 'graph of a')
+
+        # A memory hit, then a disk hit once memory is dropped
+        self.assertTrue(cache.render(render_name, a, self.out))
+        self.assertEqual(read(self.out), 'graph of a')
+        self.assertEqual(read(entry_b), 'graph of b')
+        cache._memory.clear()
+        cache._memory_size = 0
+        self.assertTrue(cache.render(render_name, b, self.out))
+        self.assertEqual(read(self.out), 'graph of b')
+        self.assertEqual(read(entry_a), 'graph of a')
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['memory_hits'],
+                          stats['misses']), (2, 1, 2))
+
+    def test_queue_path_evicts(self):
+        cache = RenderCache(self.cache_dir, max_bytes=40)
+        queue = InlineQueue()
+        for name in 'abcde':
+            self.assertFalse(cache.render(
+                render_name, self.stack(name), self.out, queue=queue))
+        # A lookup picks up what the workers wrote and applies the cap
+        self.assertTrue(cache.render(
+            render_name, self.stack('e'), self.out, queue=queue))
+
+        stats = cache.stats()
+        self.assertLessEqual(stats['bytes'], 40)
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['evictions'], 3)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        self.assertEqual(read(self.out), 'graph of e')
+
+    def test_failed_worker_renders_expire(self):
+        cache = RenderCache(self.cache_dir, pending_timeout=0)
+        cache.render(render_name, self.stack('a'), self.out,
+                     queue=LostQueue())
+        self.assertEqual(cache.stats()['pending'], 1)
+
+        self.assertFalse(cache.fetch('0' * 40, self.out))
+        stats = cache.stats()
+        self.assertEqual((stats['pending'], stats['abandoned']), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()